@@ -1,53 +1,67 @@
 import json
+import orjson
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 DATA_ROOT = Path("data")   # change if your data folder is elsewhere
+MAX_WORKERS = 32           # meta.json reads are tiny and IO-bound
+
+def read_meta(ac_dir):
+    try:
+        # stdlib json on purpose: unlike orjson it accepts NaN / Infinity
+        return json.loads((ac_dir / "meta.json").read_text(encoding="utf-8"))
+    except Exception:
+        # missing or unreadable meta.json: skip this AC
+        return None
 
 def main():
+    state_dirs = [d for d in DATA_ROOT.iterdir() if d.is_dir()]
+    jobs = [
+        (state_dir.name, ac_dir)
+        for state_dir in state_dirs
+        for ac_dir in sorted(state_dir.glob("ac=*"))
+    ]
+
+    # Overlap the small-file reads; map() keeps results in job order
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as ex:
+        metas = list(ex.map(read_meta, [ac_dir for _, ac_dir in jobs]))
+
     out = {}
-    for state_dir in DATA_ROOT.iterdir():
-        if not state_dir.is_dir():
-            continue
+    for state_dir in state_dirs:
         state = state_dir.name
-        acs = []
-        for ac_dir in sorted(state_dir.glob("ac=*")):
-            meta_path = ac_dir / "meta.json"
-            if not meta_path.exists():
-                continue
-            try:
-                meta = json.loads(meta_path.read_text(encoding="utf-8"))
-            except Exception:
-                continue
-
-            # Defensive: normalize AC number
-            ac_no = meta.get("ac_no")
-            if ac_no is None:
-                # try from folder name ac=XX
-                ac_no = int(ac_dir.name.split("=")[-1])
-            acs.append({
-                "ac_no": int(ac_no),
-                "row_count": int(meta.get("row_count", 0)),
-                "parts_count": meta.get("parts_count", None),
-                "prefix_len": int(meta.get("prefix_len", 3)),
-                "path": f"/data/{state}/ac={int(ac_no):02d}/"
-            })
-
-        acs.sort(key=lambda x: x["ac_no"])
         out[state] = {
             "state_code": state,
-            "acs": acs
+            "acs": []
         }
 
+    for (state, ac_dir), meta in zip(jobs, metas):
+        if meta is None:
+            continue
+
+        # Defensive: normalize AC number
+        ac_no = meta.get("ac_no")
+        if ac_no is None:
+            # try from folder name ac=XX
+            ac_no = int(ac_dir.name.split("=")[-1])
+        out[state]["acs"].append({
+            "ac_no": int(ac_no),
+            "row_count": int(meta.get("row_count", 0)),
+            "parts_count": meta.get("parts_count", None),
+            "prefix_len": int(meta.get("prefix_len", 3)),
+            "path": f"/data/{state}/ac={int(ac_no):02d}/"
+        })
+
+    for payload in out.values():
+        payload["acs"].sort(key=lambda x: x["ac_no"])
+
     # Write per-state manifests + a top-level manifest
     for state, payload in out.items():
-        (DATA_ROOT / state / "ac_manifest.json").write_text(
-            json.dumps(payload, ensure_ascii=False, indent=2),
-            encoding="utf-8"
+        (DATA_ROOT / state / "ac_manifest.json").write_bytes(
+            orjson.dumps(payload, option=orjson.OPT_INDENT_2)
         )
 
-    (DATA_ROOT / "manifest.json").write_text(
-        json.dumps({"states": list(out.keys())}, ensure_ascii=False, indent=2),
-        encoding="utf-8"
+    (DATA_ROOT / "manifest.json").write_bytes(
+        orjson.dumps({"states": list(out.keys())}, option=orjson.OPT_INDENT_2)
     )
 
     print("Wrote:")
@@ -1,14 +1,36 @@
 import os
 import re
-import json
 import math
+import array
 import time
-import hashlib
+import heapq
+import zlib
 from pathlib import Path
 from collections import defaultdict, Counter
+from functools import lru_cache
 from concurrent.futures import ProcessPoolExecutor, as_completed
 
-import pandas as pd
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from rapidfuzz import process as rf_process
+from rapidfuzz.distance import Levenshtein as RFL
+
+try:
+    from numba import njit, prange, set_num_threads
+except ImportError:
+    # Same kernels, just interpreted
+    prange = range
+
+    def set_num_threads(n):
+        pass
+
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
 
 # ---------------- CONFIG ----------------
 STATE_CODE = "S27"
@@ -22,8 +44,9 @@ TEXT_COLS = ["voter_name_norm", "relative_name_norm"]
 
 # Performance knobs
 MAX_WORKERS = None
-READ_ENGINE = "pyarrow"
 CHUNK_ROWS = None
+TOKEN_CACHE_SIZE = 200_000
+TRACE_BATCH_PAIRS = 4096  # candidate pairs traced per native call
 
 # Token filtering
 MIN_TOKEN_LEN = 2
@@ -31,7 +54,7 @@ MAX_TOKEN_LEN = 24
 
 # Mining knobs
 MAX_DIST = 2
-MAX_CHUNK_LEN = 3
+MAX_CHUNK_LEN = 3  # <= 4: chunks are packed 8 bits/char into 32 bits
 
 # Caps
 MAX_VARIANTS_PER_SKELETON = 40
@@ -50,19 +73,23 @@ DROP_MATRA_ONLY_FROM_MAIN = True
 # --------------------------------------
 
 
-DEVANAGARI_RE = re.compile(r"[\u0900-\u097F]+")
-PUNCT_RE = re.compile(r"[.,;:|/\\()\[\]{}<>\"'`~!@#$%^&*_+=?-]")
+# whole-token match on the Devanagari block (Arrow / RE2 syntax)
+DEVANAGARI_TOKEN_RE = r"^[\x{0900}-\x{097F}]+$"
+PUNCT_CHARS = ".,;:|/\\()[]{}<>\"'`~!@#$%^&*_+=?-"
+# punctuation and NBSP -> space
+PUNCT_RE = "[" + re.escape(PUNCT_CHARS) + "\u00A0]"
 
 # Matras / marks (for stripping in skeleton + matra-only detection)
 MATRA_SET = set(list("ािीुूेैोौृॄॢॣ"))
 MARK_SET = set(list("ँंः़्॒॑"))
 
 ONLY_MATRA_OR_MARK = MATRA_SET | MARK_SET
+STRIP_TABLE = {ord(ch): None for ch in ONLY_MATRA_OR_MARK}
 
 
 def stable_hash(s: str) -> int:
-    h = hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest()
-    return int.from_bytes(h, "big", signed=False)
+    # only used for deterministic ordering / tie-breaks, not security
+    return zlib.crc32(s.encode("utf-8"))
 
 
 def list_ac_dirs(state_dir: Path):
@@ -76,47 +103,32 @@ def list_ac_dirs(state_dir: Path):
 
 
 def read_voters_min_cols(voters_path: Path, cols):
-    return pd.read_parquet(voters_path, columns=cols, engine=READ_ENGINE)
-
-
-def normalize_spaces_and_punct(s: str) -> str:
-    if s is None:
-        return ""
-    s = str(s).replace("\u00A0", " ").strip()
-    s = re.sub(r"\s+", " ", s)
-    s = PUNCT_RE.sub(" ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return pq.read_table(voters_path, columns=cols)
 
 
-def tokenize(s: str):
-    s = normalize_spaces_and_punct(s)
-    if not s:
-        return []
-    toks = []
-    for t in s.split(" "):
-        t = t.strip()
-        if not t:
-            continue
-        if DEVANAGARI_RE.fullmatch(t):
-            if MIN_TOKEN_LEN <= len(t) <= MAX_TOKEN_LEN:
-                toks.append(t)
-    return toks
+def tokenize_column(arr):
+    """
+    All tokens of a string column as one flat Arrow array, computed with
+    Arrow kernels: punctuation -> space, split on whitespace, keep
+    Devanagari-only tokens within the length bounds.
+    Dictionary-encoded and all-null columns are cast to plain strings first.
+    """
+    arr = arr.cast(pa.string())
+    arr = pc.replace_substring_regex(arr, pattern=PUNCT_RE, replacement=" ")
+    toks = pc.list_flatten(pc.utf8_split_whitespace(arr))
+    n = pc.utf8_length(toks)
+    keep = pc.and_(
+        pc.and_(pc.greater_equal(n, MIN_TOKEN_LEN), pc.less_equal(n, MAX_TOKEN_LEN)),
+        pc.match_substring_regex(toks, DEVANAGARI_TOKEN_RE),
+    )
+    return toks.filter(keep)
 
 
 def strip_matras_marks(s: str) -> str:
-    if not s:
-        return ""
-    out = []
-    for ch in s:
-        if ch in MATRA_SET:
-            continue
-        if ch in MARK_SET:
-            continue
-        out.append(ch)
-    return "".join(out)
+    return s.translate(STRIP_TABLE) if s else ""
 
 
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
 def skeleton_key(token: str) -> str:
     """
     Blocking key:
@@ -150,116 +162,155 @@ def is_matra_only_confusion(src: str, dst: str) -> bool:
     return bs == bd
 
 
-def bounded_levenshtein(a: str, b: str, max_dist: int) -> int:
-    if a == b:
-        return 0
-    la, lb = len(a), len(b)
-    if abs(la - lb) > max_dist:
-        return max_dist + 1
-    if la > lb:
-        a, b = b, a
-        la, lb = lb, la
+# Alignment op codes written by the DP kernel (0 = cell not in band)
+OP_M, OP_S, OP_D, OP_I = 1, 2, 3, 4
 
-    prev = list(range(lb + 1))
-    for i in range(1, la + 1):
-        cur = [i] + [0] * lb
-        j_start = max(1, i - max_dist)
-        j_end = min(lb, i + max_dist)
 
-        for j in range(1, j_start):
-            cur[j] = max_dist + 1
+TOKEN_PAD = 0xFFFF
 
-        min_row = max_dist + 1
-        ai = a[i - 1]
-
-        for j in range(j_start, j_end + 1):
-            bj = b[j - 1]
-            cost = 0 if ai == bj else 1
-            cur[j] = min(
-                prev[j] + 1,
-                cur[j - 1] + 1,
-                prev[j - 1] + cost
-            )
-            if cur[j] < min_row:
-                min_row = cur[j]
 
-        for j in range(j_end + 1, lb + 1):
-            cur[j] = max_dist + 1
-
-        if min_row > max_dist:
-            return max_dist + 1
-        prev = cur
+def pack_tokens(tokens):
+    """
+    Tokens as one contiguous (n, MAX_TOKEN_LEN) uint16 codepoint matrix,
+    padded with TOKEN_PAD, plus a length vector. Devanagari fits in 16 bits.
+    """
+    n = len(tokens)
+    tok_len = np.fromiter((len(t) for t in tokens), dtype=np.int64, count=n)
+    tok_mat = np.full((n, MAX_TOKEN_LEN), TOKEN_PAD, dtype=np.uint16)
+    flat = np.frombuffer("".join(tokens).encode("utf-16-le"), dtype=np.uint16)
+    tok_mat[np.arange(MAX_TOKEN_LEN) < tok_len[:, None]] = flat
+    return tok_mat, tok_len
 
-    return prev[lb]
 
+@njit(cache=True, nogil=True)
+def bounded_levenshtein_with_trace(a, b, max_dist):
+    """
+    Banded (Ukkonen) edit distance over codepoint arrays that keeps
+    backpointers for the band, so the alignment comes out of the same DP.
+    bt only stores the band: cell (i, j) lives at bt[i, j - i + max_dist].
+    Returns (dist, ops) with ops as OP_* codes; ops is empty when
+    dist > max_dist. Ties break like a full DP: match, then S, D, I.
+    """
+    la = a.shape[0]
+    lb = b.shape[0]
+    over = max_dist + 1
+    if abs(la - lb) > max_dist:
+        return over, np.empty(0, dtype=np.int8)
 
-def align_ops(a: str, b: str):
-    la, lb = len(a), len(b)
-    dp = [[0] * (lb + 1) for _ in range(la + 1)]
-    bt = [[None] * (lb + 1) for _ in range(la + 1)]
+    prev = np.empty(lb + 1, dtype=np.int64)
+    cur = np.empty(lb + 1, dtype=np.int64)
+    bt = np.zeros((la + 1, 2 * max_dist + 1), dtype=np.int8)
+    for j in range(lb + 1):
+        prev[j] = j if j <= max_dist else over
+        if 0 < j <= max_dist:
+            bt[0, j + max_dist] = OP_I
 
     for i in range(1, la + 1):
-        dp[i][0] = i
-        bt[i][0] = "D"
-    for j in range(1, lb + 1):
-        dp[0][j] = j
-        bt[0][j] = "I"
+        cur[:] = over
+        if i <= max_dist:
+            cur[0] = i
+            bt[i, max_dist - i] = OP_D
+        j_start = max(1, i - max_dist)
+        j_end = min(lb, i + max_dist)
 
-    for i in range(1, la + 1):
+        row_min = cur[0]
         ai = a[i - 1]
-        for j in range(1, lb + 1):
-            bj = b[j - 1]
-            if ai == bj:
-                dp[i][j] = dp[i - 1][j - 1]
-                bt[i][j] = "M"
+        for j in range(j_start, j_end + 1):
+            if ai == b[j - 1]:
+                v = prev[j - 1]
+                op = OP_M
             else:
-                del_c = dp[i - 1][j] + 1
-                ins_c = dp[i][j - 1] + 1
-                sub_c = dp[i - 1][j - 1] + 1
-                m = min(del_c, ins_c, sub_c)
-                dp[i][j] = m
-                if m == sub_c:
-                    bt[i][j] = "S"
-                elif m == del_c:
-                    bt[i][j] = "D"
+                del_c = prev[j] + 1
+                ins_c = cur[j - 1] + 1
+                sub_c = prev[j - 1] + 1
+                v = min(del_c, ins_c, sub_c)
+                if v == sub_c:
+                    op = OP_S
+                elif v == del_c:
+                    op = OP_D
                 else:
-                    bt[i][j] = "I"
-
-    ops = []
+                    op = OP_I
+            cur[j] = v
+            bt[i, j - i + max_dist] = op
+            if v < row_min:
+                row_min = v
+
+        if row_min > max_dist:
+            return over, np.empty(0, dtype=np.int8)
+        prev, cur = cur, prev
+
+    dist = prev[lb]
+    if dist > max_dist:
+        return over, np.empty(0, dtype=np.int8)
+
+    ops = np.empty(la + lb, dtype=np.int8)
+    n = 0
     i, j = la, lb
     while i > 0 or j > 0:
-        op = bt[i][j]
-        if op == "M":
-            ops.append(("M", a[i - 1], b[j - 1]))
+        op = bt[i, j - i + max_dist]
+        ops[n] = op
+        n += 1
+        if op == OP_M or op == OP_S:
             i -= 1
             j -= 1
-        elif op == "S":
-            ops.append(("S", a[i - 1], b[j - 1]))
+        elif op == OP_D:
             i -= 1
-            j -= 1
-        elif op == "D":
-            ops.append(("D", a[i - 1], None))
-            i -= 1
-        elif op == "I":
-            ops.append(("I", None, b[j - 1]))
-            j -= 1
         else:
-            if i > 0:
-                ops.append(("D", a[i - 1], None))
-                i -= 1
-            elif j > 0:
-                ops.append(("I", None, b[j - 1]))
-                j -= 1
+            j -= 1
 
-    ops.reverse()
-    return ops, dp[la][lb]
+    return dist, ops[:n][::-1].copy()
 
 
-def extract_chunks(a: str, b: str, max_chunk_len: int):
-    ops, dist = align_ops(a, b)
-    if dist == 0:
-        return []
+@njit(parallel=True, cache=True, nogil=True)
+def trace_pairs(tok_mat, tok_len, pair_a, pair_b, max_dist, max_ops):
+    """
+    Trace all candidate pairs of an AC in parallel (tokens as packed by
+    pack_tokens). Row k of the returned op matrix holds pair k's ops,
+    n_ops[k] of them (0 if over max_dist).
+    """
+    n = pair_a.shape[0]
+    ops = np.zeros((n, max_ops), dtype=np.int8)
+    n_ops = np.zeros(n, dtype=np.int64)
+    for k in prange(n):
+        ta = pair_a[k]
+        tb = pair_b[k]
+        a = tok_mat[ta, :tok_len[ta]]
+        b = tok_mat[tb, :tok_len[tb]]
+        _, o = bounded_levenshtein_with_trace(a, b, max_dist)
+        m = o.shape[0]
+        ops[k, :m] = o
+        n_ops[k] = m
+    return ops, n_ops
+
+
+def chunk_code(s: str) -> int:
+    # 8 bits per Devanagari char, offset so that U+0900 is non-zero
+    v = 0
+    for ch in s:
+        v = (v << 8) | (ord(ch) - 0x08FF)
+    return v
+
+
+def chunk_key(src: str, dst: str) -> int:
+    """(src, dst) as one int: cheaper to hash than a tuple of two strings."""
+    return (chunk_code(src) << 32) | chunk_code(dst)
+
+
+def sum_by_key(keys, weights):
+    """{key: total weight} from parallel uint64 / float64 buffers."""
+    if not keys:
+        return {}
+    uniq, first, inv = np.unique(
+        np.frombuffer(keys, dtype=np.uint64), return_index=True, return_inverse=True
+    )
+    sums = np.bincount(inv, weights=np.frombuffer(weights, dtype=np.float64))
+    # first-seen order, so equal weights keep their old relative order
+    order = np.argsort(first)
+    return dict(zip(uniq[order].tolist(), sums[order].tolist()))
+
 
+def extract_chunks(a: str, b: str, ops, max_chunk_len: int):
+    """Edit chunks of a traced pair; ops are OP_* codes (empty = no chunks)."""
     chunks = []
     src_buf = []
     dst_buf = []
@@ -268,8 +319,8 @@ def extract_chunks(a: str, b: str, max_chunk_len: int):
         nonlocal src_buf, dst_buf
         if not src_buf and not dst_buf:
             return
-        src = "".join([c for c in src_buf if c is not None])
-        dst = "".join([c for c in dst_buf if c is not None])
+        src = "".join(src_buf)
+        dst = "".join(dst_buf)
 
         if len(src) > max_chunk_len or len(dst) > max_chunk_len:
             src_buf, dst_buf = [], []
@@ -287,21 +338,51 @@ def extract_chunks(a: str, b: str, max_chunk_len: int):
         chunks.append((src, dst))
         src_buf, dst_buf = [], []
 
-    for op, ca, cb in ops:
-        if op == "M":
+    i = j = 0
+    for op in ops.tolist():
+        if op == OP_M:
             flush()
-        elif op == "S":
-            src_buf.append(ca)
-            dst_buf.append(cb)
-        elif op == "D":
-            src_buf.append(ca)
-        elif op == "I":
-            dst_buf.append(cb)
+            i += 1
+            j += 1
+        elif op == OP_S:
+            src_buf.append(a[i])
+            dst_buf.append(b[j])
+            i += 1
+            j += 1
+        elif op == OP_D:
+            src_buf.append(a[i])
+            i += 1
+        elif op == OP_I:
+            dst_buf.append(b[j])
+            j += 1
 
     flush()
     return chunks
 
 
+def pairwise_distances(tokens, ii, jj, max_dist: int):
+    """
+    uint8 distances for the candidate pairs (tokens[ii[k]], tokens[jj[k]]).
+    Only pairs whose lengths are within max_dist of each other are sent to
+    rapidfuzz; every other pair is left at max_dist + 1 with no work done.
+    """
+    lens = np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens))
+    dist = np.full(len(ii), max_dist + 1, dtype=np.uint8)
+
+    near = np.flatnonzero(np.abs(lens[ii] - lens[jj]) <= max_dist)
+    if len(near):
+        dist[near] = rf_process.cpdist(
+            [tokens[i] for i in ii[near].tolist()],
+            [tokens[j] for j in jj[near].tolist()],
+            scorer=RFL.distance,
+            score_cutoff=max_dist,
+            dtype=np.uint8,
+            workers=1,
+        )
+
+    return dist
+
+
 def choose_workers():
     if MAX_WORKERS and MAX_WORKERS > 0:
         return MAX_WORKERS
@@ -312,20 +393,87 @@ def choose_workers():
     return max(2, min(12, n - 2))
 
 
+def init_worker(numba_threads: int):
+    # Each pool worker would otherwise start a cpu_count-sized Numba pool
+    set_num_threads(numba_threads)
+
+
+def candidate_batches(sk_groups, freq, batch_pairs: int):
+    """
+    Walk the skeleton groups in stable_hash order and yield candidate pairs
+    in batches of roughly batch_pairs:
+    (cand_tokens, pair_a, pair_b, pair_compared, compared_total).
+    pair_a / pair_b index into cand_tokens; pair_compared[k] is the running
+    pairs_compared count up to and including pair k, compared_total the
+    count after the batch's last skeleton. The final batch may be empty.
+    """
+    cand_tokens = []
+    cand_ids = {}
+    pair_a = []
+    pair_b = []
+    pair_compared = []
+    compared_pairs = 0
+
+    for sk in sorted(sk_groups.keys(), key=stable_hash):
+        tokens = sk_groups[sk]
+        if len(tokens) < 2:
+            continue
+
+        # top-k without sorting the whole group; same result as sorted()[:k]
+        tokens = heapq.nsmallest(
+            MAX_VARIANTS_PER_SKELETON, tokens, key=lambda x: (-freq[x], stable_hash(x))
+        )
+
+        # Same visiting order as a nested i<j loop, capped per skeleton;
+        # distances are only computed for these pairs
+        ii, jj = np.triu_indices(len(tokens), k=1)
+        ii = ii[:MAX_PAIRS_PER_SKELETON]
+        jj = jj[:MAX_PAIRS_PER_SKELETON]
+        compared_before = compared_pairs
+        compared_pairs += len(ii)
+
+        d = pairwise_distances(tokens, ii, jj, MAX_DIST)
+        pos = np.flatnonzero((d > 0) & (d <= MAX_DIST))
+
+        for p, i, j in zip(pos.tolist(), ii[pos].tolist(), jj[pos].tolist()):
+            for t in (tokens[i], tokens[j]):
+                if t not in cand_ids:
+                    cand_ids[t] = len(cand_tokens)
+                    cand_tokens.append(t)
+            pair_a.append(cand_ids[tokens[i]])
+            pair_b.append(cand_ids[tokens[j]])
+            # pairs compared up to and including this one
+            pair_compared.append(compared_before + p + 1)
+
+        if len(pair_a) >= batch_pairs:
+            yield cand_tokens, pair_a, pair_b, pair_compared, compared_pairs
+            cand_tokens = []
+            cand_ids = {}
+            pair_a = []
+            pair_b = []
+            pair_compared = []
+
+    yield cand_tokens, pair_a, pair_b, pair_compared, compared_pairs
+
+
 def mine_one_ac(ac_dir: Path):
     t0 = time.time()
     voters_path = ac_dir / "voters.parquet"
     if not voters_path.exists():
         return {"ac": ac_dir.name, "ok": False, "error": f"missing {voters_path}"}
 
-    df = read_voters_min_cols(voters_path, TEXT_COLS)
+    tbl = read_voters_min_cols(voters_path, TEXT_COLS)
 
-    freq = Counter()
-    rows = df.to_dict(orient="records")
-    for r in rows:
-        for c in TEXT_COLS:
-            for tok in tokenize(r.get(c, "")):
-                freq[tok] += 1
+    # Frequencies don't care which column a token came from: stack all
+    # text columns and tokenize + count them in one Arrow pass.
+    # Only distinct tokens reach Python.
+    # (cast first: the columns may be string / large_string / dictionary / null)
+    text = pa.chunked_array(
+        [chunk for c in TEXT_COLS for chunk in tbl.column(c).cast(pa.string()).chunks],
+        type=pa.string(),
+    )
+    vc = pc.value_counts(tokenize_column(text))
+    freq = Counter(dict(zip(vc.field("values").to_pylist(), vc.field("counts").to_pylist())))
 
     if not freq:
         return {
@@ -340,8 +488,8 @@ def mine_one_ac(ac_dir: Path):
             "seconds": round(time.time() - t0, 3),
         }
 
-    # Stop tokens
-    tokens_sorted = [t for t, _ in freq.most_common()]
+    # Stop tokens (ties broken by stable_hash, not by counting order)
+    tokens_sorted = sorted(freq, key=lambda t: (-freq[t], stable_hash(t)))
     top_n = max(1, int(len(tokens_sorted) * IGNORE_TOP_FREQ_RATIO))
     stop = set()
     for t in tokens_sorted[:top_n]:
@@ -358,85 +506,99 @@ def mine_one_ac(ac_dir: Path):
             continue
         sk_groups[sk].append(t)
 
-    # Accumulators
-    conf_main = defaultdict(float)
-    conf_matra = defaultdict(float)
+    # Accumulators, keyed by chunk_key(src, dst); weights are summed
+    # per key once at the end (sum_by_key)
+    keys_main, w_main = array.array("Q"), array.array("d")
+    keys_matra, w_matra = array.array("Q"), array.array("d")
 
     ex_main = defaultdict(list)
     ex_matra = defaultdict(list)
 
-    compared_pairs = 0
+    # key -> (src, dst, matra_only), filled on first sight
+    chunk_info = {}
+
+    # Pass 1 collects candidate pairs skeleton by skeleton; each batch is
+    # traced (Pass 2) and accumulated (Pass 3) before the next one is
+    # built, so nothing past the suggestion cap is compared or traced
     accepted_pairs = 0
+    compared_pairs = 0
+    capped = False
 
-    for sk in sorted(sk_groups.keys(), key=stable_hash):
-        tokens = sk_groups[sk]
-        if len(tokens) < 2:
+    for cand_tokens, pair_a, pair_b, pair_compared, compared_pairs in candidate_batches(
+        sk_groups, freq, TRACE_BATCH_PAIRS
+    ):
+        if not pair_a:
             continue
 
-        tokens = sorted(tokens, key=lambda x: (-freq[x], stable_hash(x)))[:MAX_VARIANTS_PER_SKELETON]
-
-        local = 0
-        n = len(tokens)
-        for i in range(n):
-            a = tokens[i]
-            for j in range(i + 1, n):
-                b = tokens[j]
-                local += 1
-                if local > MAX_PAIRS_PER_SKELETON:
-                    break
-
-                compared_pairs += 1
-                if abs(len(a) - len(b)) > MAX_DIST:
-                    continue
-
-                d = bounded_levenshtein(a, b, MAX_DIST)
-                if d == 0 or d > MAX_DIST:
-                    continue
-
-                chunks = extract_chunks(a, b, MAX_CHUNK_LEN)
-                if not chunks:
-                    continue
-
-                w = math.sqrt(freq[a] * freq[b])
-                accepted_pairs += 1
-
-                for src, dst in chunks:
-                    if is_matra_only_confusion(src, dst):
-                        conf_matra[(src, dst)] += w
-                        if len(ex_matra[(src, dst)]) < MAX_EXAMPLES_PER_PAIR:
-                            ex_matra[(src, dst)].append((a, b))
-                        # Optionally do NOT add to main
-                        if DROP_MATRA_ONLY_FROM_MAIN:
-                            continue
-
-                    conf_main[(src, dst)] += w
-                    if len(ex_main[(src, dst)]) < MAX_EXAMPLES_PER_PAIR:
-                        ex_main[(src, dst)].append((a, b))
-
-                if accepted_pairs >= MAX_SUGGESTIONS_TOTAL:
-                    break
-
-            if local > MAX_PAIRS_PER_SKELETON or accepted_pairs >= MAX_SUGGESTIONS_TOTAL:
+        # Pass 2: trace the batch in one parallel native call
+        tok_mat, tok_len = pack_tokens(cand_tokens)
+
+        pair_ops, pair_n_ops = trace_pairs(
+            tok_mat,
+            tok_len,
+            np.asarray(pair_a, dtype=np.int64),
+            np.asarray(pair_b, dtype=np.int64),
+            MAX_DIST,
+            2 * MAX_TOKEN_LEN,
+        )
+
+        # Pass 3: chunks + accumulation, in the original pair order
+        for k in range(len(pair_a)):
+            a = cand_tokens[pair_a[k]]
+            b = cand_tokens[pair_b[k]]
+
+            chunks = extract_chunks(a, b, pair_ops[k, :pair_n_ops[k]], MAX_CHUNK_LEN)
+            if not chunks:
+                continue
+
+            w = math.sqrt(freq[a] * freq[b])
+            accepted_pairs += 1
+
+            for src, dst in chunks:
+                key = chunk_key(src, dst)
+                info = chunk_info.get(key)
+                if info is None:
+                    info = chunk_info[key] = (src, dst, is_matra_only_confusion(src, dst))
+
+                if info[2]:
+                    keys_matra.append(key)
+                    w_matra.append(w)
+                    if len(ex_matra[key]) < MAX_EXAMPLES_PER_PAIR:
+                        ex_matra[key].append((a, b))
+                    # Optionally do NOT add to main
+                    if DROP_MATRA_ONLY_FROM_MAIN:
+                        continue
+
+                keys_main.append(key)
+                w_main.append(w)
+                if len(ex_main[key]) < MAX_EXAMPLES_PER_PAIR:
+                    ex_main[key].append((a, b))
+
+            if accepted_pairs >= MAX_SUGGESTIONS_TOTAL:
+                # stop counting at the pair that hit the cap
+                compared_pairs = pair_compared[k]
+                capped = True
                 break
 
-        if accepted_pairs >= MAX_SUGGESTIONS_TOTAL:
+        if capped:
             break
 
     def pack(conf_map, ex_map):
         out = []
-        for (src, dst), w in conf_map.items():
+        for key, w in conf_map.items():
+            src, dst, _ = chunk_info[key]
             if src == dst:
                 continue
             item = {"src": src, "dst": dst, "weight": float(w)}
-            ex = ex_map.get((src, dst))
+            ex = ex_map.get(key)
             if ex:
                 item["examples"] = ex
             out.append(item)
         out.sort(key=lambda x: x["weight"], reverse=True)
         return out
 
-    suggestions_main = pack(conf_main, ex_main)
-    suggestions_matra = pack(conf_matra, ex_matra)
+    suggestions_main = pack(sum_by_key(keys_main, w_main), ex_main)
+    suggestions_matra = pack(sum_by_key(keys_matra, w_matra), ex_matra)
 
     return {
         "ac": ac_dir.name,
@@ -508,12 +670,15 @@ def main():
 
     workers = choose_workers()
     print(f"Found {len(ac_dirs)} AC folders under {state_dir}")
-    print(f"Using {workers} workers")
+    numba_threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Using {workers} workers x {numba_threads} numba threads")
 
     outputs = []
     t0 = time.time()
 
-    with ProcessPoolExecutor(max_workers=workers) as ex:
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(numba_threads,)
+    ) as ex:
         futs = {ex.submit(mine_one_ac, ac): ac for ac in ac_dirs}
         for fut in as_completed(futs):
             ac = futs[fut]
@@ -534,8 +699,8 @@ def main():
             # Per-AC output (same filename)
             out_path = state_dir / ac.name / "glyph_mine.json"
             try:
-                with open(out_path, "w", encoding="utf-8") as f:
-                    json.dump(res, f, ensure_ascii=False, indent=2)
+                with open(out_path, "wb") as f:
+                    f.write(orjson.dumps(res, option=orjson.OPT_INDENT_2))
             except Exception as e:
                 print(f"⚠️  Failed to write {out_path}: {e}")
 
@@ -550,8 +715,8 @@ def main():
         "merged_count": len(merged_main),
         "top": merged_main[:2000],
     }
-    with open(merged_path, "w", encoding="utf-8") as f:
-        json.dump(merged_obj, f, ensure_ascii=False, indent=2)
+    with open(merged_path, "wb") as f:
+        f.write(orjson.dumps(merged_obj, option=orjson.OPT_INDENT_2))
 
     # Merge state-wide MATRA-ONLY (new file, for inspection / optional use)
     merged_matra = merge_ac_outputs(outputs, "matra_only")
@@ -564,8 +729,8 @@ def main():
         "merged_count": len(merged_matra),
         "top": merged_matra[:2000],
     }
-    with open(merged_matra_path, "w", encoding="utf-8") as f:
-        json.dump(merged_matra_obj, f, ensure_ascii=False, indent=2)
+    with open(merged_matra_path, "wb") as f:
+        f.write(orjson.dumps(merged_matra_obj, option=orjson.OPT_INDENT_2))
 
     print("\nDone.")
     print(f"Per-AC outputs written to: {state_dir}/ac=XX/glyph_mine.json")